@@ -6,8 +6,14 @@
 # across multiple schemas and tables with dynamic filtering and visualizations.
 # =============================================================================
 
+import functools
+import time
+import uuid
+
 import streamlit as st
+import numpy as np
 import pandas as pd
+from snowflake.snowpark import functions as F
 from snowflake.snowpark.context import get_active_session
 
 # =============================================================================
@@ -25,7 +31,7 @@ st.set_page_config(
 # CUSTOM STYLING
 # =============================================================================
 
-st.markdown("""
+APP_CSS = """
 <style>
     /* Main theme colors */
     :root {
@@ -129,7 +135,12 @@ st.markdown("""
         margin: 1.5rem 0;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+@st.cache_resource
+def inject_css():
+    """Inject the app stylesheet (cached, so the markup is built once and replayed)."""
+    st.markdown(APP_CSS, unsafe_allow_html=True)
 
 # =============================================================================
 # DATABASE CONNECTION & HELPER FUNCTIONS
@@ -140,84 +151,389 @@ def get_session():
     """Get the active Snowflake session."""
     return get_active_session()
 
+@st.cache_resource
+def get_export_stage(_session) -> str:
+    """Create the temporary stage used to unload CSV exports (once per session)."""
+    stage = "DATA_EXPLORER_EXPORT_STAGE"
+    _session.sql(f"CREATE TEMPORARY STAGE IF NOT EXISTS {stage}").collect()
+    return stage
+
+def qident(name: str) -> str:
+    """Quote a Snowflake identifier (schema, table or column name) for use in SQL."""
+    return '"' + name.replace('"', '""') + '"'
+
+def qualified_name(database: str, schema: str, table: str) -> str:
+    """Build the fully qualified, quoted name of a table."""
+    return f"{qident(database)}.{qident(schema)}.{qident(table)}"
+
 @st.cache_data(ttl=600)
-def get_schemas(_session, database: str) -> list:
-    """Retrieve all schemas in the database (excluding system schemas)."""
+def get_db_snapshot(_session, database: str) -> dict:
+    """Retrieve schema, table and column metadata for the whole database in one query."""
     query = f"""
-        SELECT SCHEMA_NAME 
-        FROM {database}.INFORMATION_SCHEMA.SCHEMATA 
-        WHERE SCHEMA_NAME NOT IN ('INFORMATION_SCHEMA', 'PUBLIC')
-        ORDER BY SCHEMA_NAME
+        SELECT 
+            c.TABLE_SCHEMA,
+            c.TABLE_NAME,
+            c.COLUMN_NAME,
+            c.DATA_TYPE,
+            c.IS_NULLABLE,
+            c.ORDINAL_POSITION
+        FROM {qident(database)}.INFORMATION_SCHEMA.COLUMNS c
+        JOIN {qident(database)}.INFORMATION_SCHEMA.TABLES t
+            ON t.TABLE_SCHEMA = c.TABLE_SCHEMA
+            AND t.TABLE_NAME = c.TABLE_NAME
+        WHERE c.TABLE_SCHEMA NOT IN ('INFORMATION_SCHEMA', 'PUBLIC')
+        AND t.TABLE_TYPE = 'BASE TABLE'
+        ORDER BY c.TABLE_SCHEMA, c.TABLE_NAME, c.ORDINAL_POSITION
     """
-    df = _session.sql(query).to_pandas()
-    return df['SCHEMA_NAME'].tolist()
+    snapshot = {}
+    for row in _session.sql(query).collect():
+        columns = snapshot.setdefault(row['TABLE_SCHEMA'], {}).setdefault(row['TABLE_NAME'], [])
+        columns.append((row['COLUMN_NAME'], row['DATA_TYPE'], row['IS_NULLABLE'], row['ORDINAL_POSITION']))
+    return snapshot
+
+def get_schemas(_session, database: str) -> list:
+    """Retrieve all schemas in the database that contain tables (excluding system schemas)."""
+    return sorted(get_db_snapshot(_session, database))
 
-@st.cache_data(ttl=600)
 def get_tables(_session, database: str, schema: str) -> list:
     """Retrieve all tables in the specified schema."""
+    return sorted(get_db_snapshot(_session, database).get(schema, {}))
+
+def get_column_metadata(_session, database: str, schema: str, table: str) -> pd.DataFrame:
+    """Retrieve column metadata for the specified table."""
+    columns = get_db_snapshot(_session, database).get(schema, {}).get(table, [])
+    return pd.DataFrame(columns, columns=['COLUMN_NAME', 'DATA_TYPE', 'IS_NULLABLE', 'ORDINAL_POSITION'])
+
+# Rows drawn from the filtered rows in sample mode (data view and visualizations)
+SAMPLE_ROWS = 10000
+
+# Seconds a cached filtered result is reused (the data helpers' cache TTL)
+FILTERED_SOURCE_TTL = 300
+
+@st.cache_data(ttl=300)
+def get_table_preview(_session, database: str, schema: str, table: str, limit: int = None,
+                      columns: tuple = None, sample_rows: int = None) -> pd.DataFrame:
+    """Retrieve the first rows of the specified table (all rows when limit is None)."""
+    return fetch_table_frame(_session, database, schema, table, {}, limit, columns, sample_rows)
+
+def get_filtered_source(session, database: str, schema: str, table: str, filters: dict):
+    """Get the rows matching the active filters as a Snowpark DataFrame (materialized once)."""
+    if not filters:
+        return session.table(qualified_name(database, schema, table))
+    
+    signature, params = split_filters(filters)
+    key = (database, schema, table, signature, tuple(params))
+    cached = st.session_state.get('filtered_source')
+    if cached is not None:
+        if cached['key'] == key and time.time() - cached['created_at'] < FILTERED_SOURCE_TTL:
+            return cached['df']
+        drop_filtered_source()
+    
+    query = build_filter_template(database, schema, table, signature)
+    df = session.sql(query, params=params).cache_result()
+    st.session_state['filtered_source'] = {'key': key, 'df': df, 'created_at': time.time()}
+    return df
+
+def drop_filtered_source(database: str = None, schema: str = None, table: str = None):
+    """Drop the cached filtered result, unless it belongs to the given table."""
+    cached = st.session_state.get('filtered_source')
+    if cached is None or cached['key'][:3] == (database, schema, table):
+        return
+    cached['df'].drop_table()
+    del st.session_state['filtered_source']
+
+@st.cache_data(ttl=300)
+def get_row_count(_session, database: str, schema: str, table: str, filters: dict) -> int:
+    """Count the rows matching the active filters (all rows when none are active)."""
+    return get_filtered_source(_session, database, schema, table, filters).count()
+
+@st.cache_data(ttl=300)
+def get_filtered_table_data(_session, database: str, schema: str, table: str,
+                            filters: dict, row_limit: int = None,
+                            columns: tuple = None, sample_rows: int = None) -> pd.DataFrame:
+    """Retrieve only the rows matching the active filters (filtered in Snowflake)."""
+    return fetch_table_frame(
+        _session, database, schema, table, filters, row_limit, columns, sample_rows
+    )
+
+@st.cache_data(ttl=300)
+def get_distinct_values(_session, database: str, schema: str, table: str, column: str,
+                        limit: int = None) -> list:
+    """Get distinct values for a column (for dropdown filters)."""
+    col = qident(column)
     query = f"""
-        SELECT TABLE_NAME 
-        FROM {database}.INFORMATION_SCHEMA.TABLES 
-        WHERE TABLE_SCHEMA = '{schema}'
-        AND TABLE_TYPE = 'BASE TABLE'
-        ORDER BY TABLE_NAME
+        SELECT DISTINCT {col} 
+        FROM {qualified_name(database, schema, table)} 
+        WHERE {col} IS NOT NULL
+        ORDER BY {col}
     """
-    df = _session.sql(query).to_pandas()
-    return df['TABLE_NAME'].tolist()
+    if limit is not None:
+        query += f"LIMIT {int(limit)}"
+    return [row[0] for row in _session.sql(query).collect()]
 
 @st.cache_data(ttl=600)
-def get_column_metadata(_session, database: str, schema: str, table: str) -> pd.DataFrame:
-    """Retrieve column metadata for the specified table."""
+def get_column_stats(_session, database: str, schema: str, table: str, column: str,
+                     kind: str) -> dict:
+    """Get the values needed to build a filter widget, computed in Snowflake."""
+    if kind == 'categorical':
+        return {'values': get_distinct_values(_session, database, schema, table, column, limit=51)}
+    
+    col = qident(column)
     query = f"""
-        SELECT 
-            COLUMN_NAME,
-            DATA_TYPE,
-            IS_NULLABLE,
-            ORDINAL_POSITION
-        FROM {database}.INFORMATION_SCHEMA.COLUMNS
-        WHERE TABLE_SCHEMA = '{schema}'
-        AND TABLE_NAME = '{table}'
-        ORDER BY ORDINAL_POSITION
+        SELECT MIN({col}), MAX({col}), COUNT_IF({col} IS NOT NULL)
+        FROM {qualified_name(database, schema, table)}
     """
-    return _session.sql(query).to_pandas()
+    min_val, max_val, count = _session.sql(query).collect()[0]
+    return {'min': min_val, 'max': max_val, 'count': count}
 
 @st.cache_data(ttl=300)
-def get_table_data(_session, database: str, schema: str, table: str) -> pd.DataFrame:
-    """Retrieve all data from the specified table."""
-    query = f'SELECT * FROM {database}.{schema}.{table}'
-    return _session.sql(query).to_pandas()
+def get_sorted_options(_session, database: str, schema: str, table: str, column: str) -> list:
+    """Get the multiselect options for a categorical column, sorted once per column."""
+    values = get_column_stats(_session, database, schema, table, column, 'categorical')['values']
+    # Snowflake already returns text values in order; only other types need sorting here
+    if all(isinstance(v, str) for v in values):
+        return values
+    return sorted(values, key=str)
 
 @st.cache_data(ttl=300)
-def get_distinct_values(_session, database: str, schema: str, table: str, column: str) -> list:
-    """Get distinct values for a column (for dropdown filters)."""
-    query = f"""
-        SELECT DISTINCT {column} 
-        FROM {database}.{schema}.{table} 
-        WHERE {column} IS NOT NULL
-        ORDER BY {column}
+def get_column_counts(_session, database: str, schema: str, table: str,
+                      categorical_cols: list, numeric_cols: list, filters: dict,
+                      sample_rows: int = None) -> dict:
+    """Count distinct values (categorical) and non-null values (numeric) over the filtered rows."""
+    if not categorical_cols and not numeric_cols:
+        return {}
+    
+    source = get_filtered_source(_session, database, schema, table, filters)
+    if sample_rows is not None:
+        source = source.sample(n=sample_rows)
+    aggregates = [F.count_distinct(F.col(qident(c))) for c in categorical_cols]
+    aggregates += [F.count(F.col(qident(c))) for c in numeric_cols]
+    row = source.agg(*aggregates).collect()[0]
+    return dict(zip(categorical_cols + numeric_cols, row))
+
+@st.cache_data(ttl=300)
+def get_value_counts(_session, database: str, schema: str, table: str, column: str,
+                     filters: dict, limit: int = 10, sort_by_value: bool = False,
+                     sample_rows: int = None) -> pd.Series:
+    """Count rows per value of a column over the filtered rows."""
+    source = get_filtered_source(_session, database, schema, table, filters)
+    if sample_rows is not None:
+        source = source.sample(n=sample_rows)
+    col = F.col(qident(column))
+    rows = (
+        source.filter(col.is_not_null())
+        .group_by(col)
+        .count()
+        .sort(col if sort_by_value else F.col('COUNT').desc())
+        .limit(limit)
+        .collect()
+    )
+    return pd.Series([row[1] for row in rows], index=[row[0] for row in rows], name='COUNT')
+
+@st.cache_data(ttl=300)
+def get_group_agg(_session, database: str, schema: str, table: str, group_col: str,
+                  num_col: str, filters: dict, limit: int = 10,
+                  sample_rows: int = None) -> pd.Series:
+    """Average a numeric column per group over the filtered rows (highest averages first)."""
+    source = get_filtered_source(_session, database, schema, table, filters)
+    if sample_rows is not None:
+        source = source.sample(n=sample_rows)
+    group = F.col(qident(group_col))
+    rows = (
+        source.filter(group.is_not_null())
+        .group_by(group)
+        .agg(F.avg(F.col(qident(num_col))).alias('AVG'))
+        .sort(F.col('AVG').desc_nulls_last())
+        .limit(limit)
+        .collect()
+    )
+    return pd.Series([row[1] for row in rows], index=[row[0] for row in rows],
+                     name=num_col, dtype='float64')
+
+@st.cache_data(ttl=300)
+def get_summary_stats(_session, database: str, schema: str, table: str,
+                      columns: list, filters: dict) -> pd.DataFrame:
+    """Compute describe()-style summary statistics for numeric columns in a single query."""
+    stat_names = ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
+    aggregates = []
+    for c in columns:
+        col = F.col(qident(c))
+        aggregates += [
+            F.count(col),
+            F.avg(col),
+            F.stddev(col),
+            F.min(col),
+            F.approx_percentile(col, 0.25),
+            F.approx_percentile(col, 0.5),
+            F.approx_percentile(col, 0.75),
+            F.max(col),
+        ]
+    
+    source = get_filtered_source(_session, database, schema, table, filters)
+    row = source.agg(*aggregates).collect()[0]
+    values = [float(v) if v is not None else float('nan') for v in row]
+    
+    n_stats = len(stat_names)
+    return pd.DataFrame(
+        {c: values[i * n_stats:(i + 1) * n_stats] for i, c in enumerate(columns)},
+        index=stat_names
+    )
+
+def export_filtered_csv(session, database: str, schema: str, table: str, filters: dict) -> bytes:
+    """Unload the filtered rows to a single staged CSV file and return its contents."""
+    # Unique per export, so concurrent exports on the shared stage never collide
+    stage_path = f"@{get_export_stage(session)}/{schema}_{table}_{uuid.uuid4().hex}.csv"
+    source = get_filtered_source(session, database, schema, table, filters)
+    copy_query = f"""
+        COPY INTO {stage_path}
+        FROM {source.table_name}
+        FILE_FORMAT = (TYPE = CSV COMPRESSION = NONE FIELD_OPTIONALLY_ENCLOSED_BY = '"' NULL_IF = (''))
+        HEADER = TRUE
+        SINGLE = TRUE
+        MAX_FILE_SIZE = 5368709120
     """
-    df = _session.sql(query).to_pandas()
-    return df[column].tolist()
+    session.sql(copy_query).collect()
+    
+    try:
+        with session.file.get_stream(stage_path) as stream:
+            return stream.read()
+    finally:
+        session.sql(f"REMOVE {stage_path}").collect()
 
+# Snowflake data type names (or prefixes) mapped to filter types
+COLUMN_TYPE_MAP = {
+    'NUMBER': 'numeric', 'DECIMAL': 'numeric', 'NUMERIC': 'numeric',
+    'INT': 'numeric', 'INTEGER': 'numeric', 'BIGINT': 'numeric', 'SMALLINT': 'numeric',
+    'TINYINT': 'numeric', 'BYTEINT': 'numeric',
+    'FLOAT': 'numeric', 'DOUBLE': 'numeric', 'REAL': 'numeric', 'DECFLOAT': 'numeric',
+    'DATE': 'date', 'TIME': 'date', 'TIMESTAMP': 'date',
+    'TIMESTAMP_NTZ': 'date', 'TIMESTAMP_LTZ': 'date', 'TIMESTAMP_TZ': 'date',
+    'BOOLEAN': 'boolean'
+}
+
+@functools.lru_cache(maxsize=64)
 def classify_column_type(data_type: str) -> str:
     """Classify column data type for filter type determination."""
     data_type = data_type.upper()
     
-    if any(t in data_type for t in ['INT', 'NUMBER', 'DECIMAL', 'FLOAT', 'DOUBLE', 'REAL']):
-        return 'numeric'
-    elif any(t in data_type for t in ['DATE', 'TIME', 'TIMESTAMP']):
-        return 'date'
-    elif any(t in data_type for t in ['BOOL']):
-        return 'boolean'
-    else:
-        return 'categorical'
+    # Metadata type names are canonical, so try an exact match before prefixes
+    if data_type in COLUMN_TYPE_MAP:
+        return COLUMN_TYPE_MAP[data_type]
+    return next(
+        (col_type for name, col_type in COLUMN_TYPE_MAP.items() if data_type.startswith(name)),
+        'categorical'
+    )
+
+def split_filters(filters: dict) -> tuple:
+    """Split the active filters into a SQL signature and their bind parameters."""
+    signature = []
+    params = []
+    
+    for column, filter_config in filters.items():
+        filter_type = filter_config.get('type')
+        value = filter_config.get('value')
+        
+        if value is None:
+            continue
+            
+        if filter_type == 'categorical':
+            if isinstance(value, list) and len(value) > 0:
+                values = list(value)
+            else:
+                continue
+        elif filter_type in ('numeric', 'date'):
+            if isinstance(value, tuple) and len(value) == 2:
+                values = list(value)
+            else:
+                continue
+        elif filter_type == 'boolean':
+            if value != 'All':
+                values = [value == 'True']
+            else:
+                continue
+        else:
+            continue
+        
+        signature.append((column, filter_type, len(values)))
+        params.extend(values)
+    
+    return tuple(signature), params
+
+@functools.lru_cache(maxsize=256)
+def build_where_template(signature: tuple) -> str:
+    """Build the parameterized WHERE clause for a filter signature (see split_filters)."""
+    predicates = []
+    
+    for column, filter_type, n_values in signature:
+        if filter_type == 'categorical':
+            placeholders = ', '.join(['?'] * n_values)
+            predicates.append(f"{qident(column)} IN ({placeholders})")
+        elif filter_type in ('numeric', 'date'):
+            predicates.append(f"{qident(column)} BETWEEN ? AND ?")
+        elif filter_type == 'boolean':
+            predicates.append(f"{qident(column)} = ?")
+    
+    if not predicates:
+        return ''
+    return 'WHERE ' + ' AND '.join(predicates)
+
+@functools.lru_cache(maxsize=256)
+def build_filter_template(database: str, schema: str, table: str, signature: tuple) -> str:
+    """Build the parameterized filtered SELECT for a table and filter signature."""
+    query = f'SELECT * FROM {qualified_name(database, schema, table)}'
+    return f'{query} {build_where_template(signature)}'.rstrip()
+
+@st.cache_data(ttl=600)
+def get_classified_columns(_session, database: str, schema: str, table: str) -> dict:
+    """Classify a table's columns by filter type once per table."""
+    column_metadata = get_column_metadata(_session, database, schema, table)
+    
+    classified = {'numeric': [], 'date': [], 'categorical': [], 'boolean': [], 'all': []}
+    for row in column_metadata.itertuples(index=False):
+        col_type = classify_column_type(row.DATA_TYPE)
+        classified['all'].append((row.COLUMN_NAME, row.DATA_TYPE, col_type))
+        classified[col_type].append(row.COLUMN_NAME)
+    
+    return classified
+
+def fetch_table_frame(_session, database: str, schema: str, table: str, filters: dict,
+                      row_limit: int = None, columns: tuple = None,
+                      sample_rows: int = None) -> pd.DataFrame:
+    """Fetch the filtered rows as Arrow and return the prepared result."""
+    source = get_filtered_source(_session, database, schema, table, filters)
+    if columns:
+        source = source.select([F.col(qident(c)) for c in columns])
+    if sample_rows is not None:
+        source = source.sample(n=sample_rows)
+    if row_limit is not None:
+        source = source.limit(row_limit)
+    arrow_table = source.to_arrow()
+    df = arrow_table.to_pandas(types_mapper=pd.ArrowDtype)
+    return prepare_df(_session, database, schema, table, df)
+
+def prepare_df(_session, database: str, schema: str, table: str, df: pd.DataFrame) -> pd.DataFrame:
+    """Convert column types once, when table data is loaded."""
+    classified = get_classified_columns(_session, database, schema, table)
+    conversions = {}
+    for name, data_type, col_type in classified['all']:
+        if name not in df.columns:
+            continue
+        if col_type == 'date':
+            if data_type.upper().startswith(('DATE', 'TIMESTAMP')):
+                conversions[name] = pd.to_datetime(df[name], errors='coerce')
+        elif col_type == 'categorical' and df[name].nunique() <= len(df) // 2:
+            conversions[name] = df[name].astype('category')
+    return df.assign(**conversions)
 
 def apply_filters(df: pd.DataFrame, filters: dict) -> pd.DataFrame:
-    """Apply all active filters to the dataframe."""
-    filtered_df = df.copy()
+    """Apply all active filters to an in-memory dataframe (client-side fallback)."""
+    if not filters:
+        return df
+    
+    mask = np.ones(len(df), dtype=bool)
     
     for column, filter_config in filters.items():
-        if column not in filtered_df.columns:
+        if column not in df.columns:
             continue
             
         filter_type = filter_config.get('type')
@@ -226,31 +542,26 @@ def apply_filters(df: pd.DataFrame, filters: dict) -> pd.DataFrame:
         if value is None:
             continue
             
+        col = df[column]
         if filter_type == 'categorical':
             if isinstance(value, list) and len(value) > 0:
-                filtered_df = filtered_df[filtered_df[column].isin(value)]
+                mask &= col.isin(value).to_numpy(dtype=bool)
         elif filter_type == 'numeric':
             if isinstance(value, tuple) and len(value) == 2:
                 min_val, max_val = value
-                filtered_df = filtered_df[
-                    (filtered_df[column] >= min_val) & 
-                    (filtered_df[column] <= max_val)
-                ]
+                mask &= col.between(min_val, max_val).to_numpy(dtype=bool, na_value=False)
         elif filter_type == 'date':
             if isinstance(value, tuple) and len(value) == 2:
                 start_date, end_date = value
-                # Convert column to datetime if not already
-                filtered_df[column] = pd.to_datetime(filtered_df[column])
-                filtered_df = filtered_df[
-                    (filtered_df[column] >= pd.to_datetime(start_date)) & 
-                    (filtered_df[column] <= pd.to_datetime(end_date))
-                ]
+                mask &= col.between(
+                    pd.to_datetime(start_date), pd.to_datetime(end_date)
+                ).to_numpy(dtype=bool, na_value=False)
         elif filter_type == 'boolean':
             if value != 'All':
                 bool_val = value == 'True'
-                filtered_df = filtered_df[filtered_df[column] == bool_val]
+                mask &= (col == bool_val).to_numpy(dtype=bool, na_value=False)
     
-    return filtered_df
+    return df.loc[mask]
 
 # =============================================================================
 # MAIN APPLICATION
@@ -260,6 +571,9 @@ def main():
     # Database configuration
     DATABASE = "DEMO_HE_STREAMLIT"
     
+    # Styling
+    inject_css()
+    
     # Get session
     session = get_session()
     
@@ -312,37 +626,81 @@ def main():
             help="Choose a table to view and filter its data"
         )
         
+        # Row limit selector (chosen before loading so the limit reaches the query)
+        row_limit_options = {
+            "5 rows": 5,
+            "20 rows": 20,
+            "50 rows": 50,
+            "100 rows": 100,
+            "All rows": None
+        }
+        selected_limit = st.selectbox(
+            "📏 Display Limit",
+            options=list(row_limit_options.keys()),
+            index=1,  # Default to 20 rows
+            help="Choose how many rows to display in the data view"
+        )
+        row_limit = row_limit_options[selected_limit]
+        
         st.markdown("---")
         
         # Table info
         st.markdown("### ℹ️ Table Information")
-        column_metadata = get_column_metadata(session, DATABASE, selected_schema, selected_table)
+        classified = get_classified_columns(session, DATABASE, selected_schema, selected_table)
         
         st.markdown(f"""
         <div class="metric-card">
             <h3>Columns</h3>
-            <p class="value">{len(column_metadata)}</p>
+            <p class="value">{len(classified['all'])}</p>
         </div>
         """, unsafe_allow_html=True)
         
         with st.expander("📝 Column Details", expanded=False):
-            for _, row in column_metadata.iterrows():
-                col_type = classify_column_type(row['DATA_TYPE'])
+            for col_name, data_type, col_type in classified['all']:
                 type_icon = {
                     'numeric': '🔢',
                     'date': '📅',
                     'categorical': '🏷️',
                     'boolean': '✅'
                 }.get(col_type, '📝')
-                st.markdown(f"{type_icon} **{row['COLUMN_NAME']}** - `{row['DATA_TYPE']}`")
+                st.markdown(f"{type_icon} **{col_name}** - `{data_type}`")
+        
+        # Column selection (filter columns and which columns are fetched)
+        column_names = [col_name for col_name, _, _ in classified['all']]
+        default_columns = column_names[:12]
+        
+        filter_column_names = st.multiselect(
+            "🧮 Filter Columns",
+            options=column_names,
+            default=default_columns,
+            key=f"filter_cols_{selected_schema}_{selected_table}",
+            help="Choose which columns get filters (the first 12 columns by default)"
+        )
+        
+        load_all_columns = st.toggle(
+            "Load all columns",
+            value=False,
+            help="Fetch every column for the data view (otherwise only the first 12 and the filter columns)"
+        )
+        
+        sample_mode = st.toggle(
+            "Sample mode (fast)",
+            value=True,
+            help=f"Show and chart a {SAMPLE_ROWS:,}-row sample of the filtered rows "
+                 "(summary statistics and CSV export always use all rows)"
+        )
+        sample_rows = SAMPLE_ROWS if sample_mode else None
     
     # ==========================================================================
     # MAIN CONTENT AREA
     # ==========================================================================
     
-    # Load table data
+    # Release the previous table's cached filtered result
+    drop_filtered_source(DATABASE, selected_schema, selected_table)
+    
+    # Count table rows (the rows themselves are only fetched for display)
     with st.spinner(f"Loading data from {selected_schema}.{selected_table}..."):
-        df = get_table_data(session, DATABASE, selected_schema, selected_table)
+        total_rows = get_row_count(session, DATABASE, selected_schema, selected_table, {})
     
     # Display table context
     col1, col2, col3 = st.columns([2, 2, 2])
@@ -351,7 +709,7 @@ def main():
     with col2:
         st.markdown(f'<span class="table-badge">Table: {selected_table}</span>', unsafe_allow_html=True)
     with col3:
-        st.markdown(f'<span class="table-badge">Total Records: {len(df):,}</span>', unsafe_allow_html=True)
+        st.markdown(f'<span class="table-badge">Total Records: {total_rows:,}</span>', unsafe_allow_html=True)
     
     st.markdown('<div class="section-divider"></div>', unsafe_allow_html=True)
     
@@ -363,27 +721,12 @@ def main():
     
     filters = {}
     
-    # Create filter columns based on number of filterable columns
-    filter_columns = column_metadata.head(12)  # Limit to first 12 columns for UI
-    
-    # Group columns by type for organized display
-    numeric_cols = []
-    date_cols = []
-    categorical_cols = []
-    boolean_cols = []
-    
-    for _, row in filter_columns.iterrows():
-        col_name = row['COLUMN_NAME']
-        col_type = classify_column_type(row['DATA_TYPE'])
-        
-        if col_type == 'numeric':
-            numeric_cols.append(col_name)
-        elif col_type == 'date':
-            date_cols.append(col_name)
-        elif col_type == 'boolean':
-            boolean_cols.append(col_name)
-        else:
-            categorical_cols.append(col_name)
+    # Filter columns grouped by type for organized display
+    selected_filter_columns = set(filter_column_names)
+    numeric_cols = [c for c in classified['numeric'] if c in selected_filter_columns]
+    date_cols = [c for c in classified['date'] if c in selected_filter_columns]
+    categorical_cols = [c for c in classified['categorical'] if c in selected_filter_columns]
+    boolean_cols = [c for c in classified['boolean'] if c in selected_filter_columns]
     
     # Categorical filters (dropdowns)
     if categorical_cols:
@@ -392,13 +735,15 @@ def main():
         
         for idx, col_name in enumerate(categorical_cols[:6]):  # Limit to 6 categorical filters
             with cat_filter_cols[idx % 3]:
-                unique_values = df[col_name].dropna().unique().tolist()
+                unique_values = get_sorted_options(
+                    session, DATABASE, selected_schema, selected_table, col_name
+                )
                 
                 # Only show multiselect if there are reasonable number of unique values
                 if len(unique_values) <= 50:
                     selected_values = st.multiselect(
                         f"{col_name}",
-                        options=sorted(unique_values, key=str),
+                        options=unique_values,
                         default=[],
                         key=f"cat_{col_name}"
                     )
@@ -412,14 +757,16 @@ def main():
         
         for idx, col_name in enumerate(numeric_cols[:6]):  # Limit to 6 numeric filters
             with num_filter_cols[idx % 3]:
-                col_data = df[col_name].dropna()
-                if len(col_data) > 0:
-                    min_val = float(col_data.min())
-                    max_val = float(col_data.max())
+                col_stats = get_column_stats(
+                    session, DATABASE, selected_schema, selected_table, col_name, 'numeric'
+                )
+                if col_stats['count'] > 0:
+                    min_val = float(col_stats['min'])
+                    max_val = float(col_stats['max'])
                     
                     if min_val < max_val:
-                        # Determine step based on data type
-                        if col_data.dtype in ['int64', 'int32']:
+                        # Determine step based on data type (integer columns come back as int)
+                        if isinstance(col_stats['min'], int) and isinstance(col_stats['max'], int):
                             step = 1.0
                         else:
                             step = (max_val - min_val) / 100
@@ -444,10 +791,12 @@ def main():
         
         for idx, col_name in enumerate(date_cols[:3]):  # Limit to 3 date filters
             with date_filter_cols[idx % 3]:
-                col_data = pd.to_datetime(df[col_name].dropna())
-                if len(col_data) > 0:
-                    min_date = col_data.min().date()
-                    max_date = col_data.max().date()
+                col_stats = get_column_stats(
+                    session, DATABASE, selected_schema, selected_table, col_name, 'date'
+                )
+                if col_stats['count'] > 0:
+                    min_date = pd.to_datetime(col_stats['min']).date()
+                    max_date = pd.to_datetime(col_stats['max']).date()
                     
                     date_range = st.date_input(
                         f"{col_name}",
@@ -483,12 +832,37 @@ def main():
     # APPLY FILTERS AND DISPLAY DATA
     # ==========================================================================
     
-    # Apply filters
-    filtered_df = apply_filters(df, filters)
+    # Columns fetched for the data view (pruned in the SELECT unless all are requested)
+    if load_all_columns:
+        display_columns = None
+    else:
+        keep_columns = set(default_columns) | selected_filter_columns
+        display_columns = tuple(c for c in column_names if c in keep_columns)
+    
+    # Record counts are always exact; only the fetched rows come from the sample
+    if filters:
+        filtered_rows = get_row_count(session, DATABASE, selected_schema, selected_table, filters)
+    else:
+        filtered_rows = total_rows
+    
+    # Apply filters (pushed down to Snowflake so only matching rows are returned)
+    # and the row limit (only the displayed rows are fetched, so no sample is needed)
+    fetch_sample_rows = sample_rows if row_limit is None else None
+    with st.spinner("Applying filters..."):
+        if filters:
+            display_df = get_filtered_table_data(
+                session, DATABASE, selected_schema, selected_table, filters, row_limit,
+                display_columns, fetch_sample_rows
+            )
+        else:
+            display_df = get_table_preview(
+                session, DATABASE, selected_schema, selected_table, row_limit,
+                display_columns, fetch_sample_rows
+            )
     
     # Display filter summary
     if filters:
-        st.info(f"🔍 **Active Filters:** {len(filters)} | Showing {len(filtered_df):,} of {len(df):,} records")
+        st.info(f"🔍 **Active Filters:** {len(filters)} | Showing {filtered_rows:,} of {total_rows:,} records")
     
     # ==========================================================================
     # DATA DISPLAY
@@ -497,43 +871,30 @@ def main():
     st.markdown("### 📊 Data View")
     
     # Data display options
-    col1, col2, col3 = st.columns([2, 1, 1])
-    
-    with col1:
-        # Row limit selector
-        row_limit_options = {
-            "5 rows": 5,
-            "20 rows": 20,
-            "50 rows": 50,
-            "100 rows": 100,
-            "All rows": None
-        }
-        selected_limit = st.selectbox(
-            "📏 Display Limit",
-            options=list(row_limit_options.keys()),
-            index=1,  # Default to 20 rows
-            help="Choose how many rows to display in the data view"
-        )
-        row_limit = row_limit_options[selected_limit]
-    
-    with col3:
-        # Export button
-        csv = filtered_df.to_csv(index=False)
-        st.download_button(
-            label="📥 Export to CSV",
-            data=csv,
-            file_name=f"{selected_schema}_{selected_table}_export.csv",
-            mime="text/csv",
-            use_container_width=True
-        )
+    col1, col2 = st.columns([3, 1])
+    with col2:
+        # Export button (Snowflake writes the CSV only when an export is requested)
+        if st.button("📥 Export to CSV", use_container_width=True):
+            with st.spinner("Exporting..."):
+                csv_data = export_filtered_csv(
+                    session, DATABASE, selected_schema, selected_table, filters
+                )
+            st.download_button(
+                label="💾 Download CSV",
+                data=csv_data,
+                file_name=f"{selected_schema}_{selected_table}_export.csv",
+                mime="text/csv",
+                use_container_width=True
+            )
     
-    # Apply row limit for display
-    if row_limit is not None:
-        display_df = filtered_df.head(row_limit)
-        st.caption(f"Showing {len(display_df):,} of {len(filtered_df):,} filtered records")
+    # Row limit caption
+    if sample_mode and row_limit is None:
+        st.caption(f"Showing {len(display_df):,} of {filtered_rows:,} filtered records"
+                   f" | Based on {SAMPLE_ROWS // 1000}k-row sample")
+    elif row_limit is not None:
+        st.caption(f"Showing {len(display_df):,} of {filtered_rows:,} filtered records")
     else:
-        display_df = filtered_df
-        st.caption(f"Showing all {len(filtered_df):,} filtered records")
+        st.caption(f"Showing all {filtered_rows:,} filtered records")
     
     # Display dataframe
     st.dataframe(
@@ -549,11 +910,18 @@ def main():
     st.markdown('<div class="section-divider"></div>', unsafe_allow_html=True)
     st.markdown("### 📈 Quick Insights")
     
+    if sample_mode:
+        st.caption(f"Based on {SAMPLE_ROWS // 1000}k-row sample")
+    
     viz_col1, viz_col2 = st.columns(2)
     
     # Find good columns for visualization
-    viz_categorical = [c for c in categorical_cols if len(filtered_df[c].unique()) <= 15 and len(filtered_df[c].unique()) > 1]
-    viz_numeric = [c for c in numeric_cols if filtered_df[c].notna().sum() > 0]
+    column_counts = get_column_counts(
+        session, DATABASE, selected_schema, selected_table, categorical_cols, numeric_cols, filters,
+        sample_rows
+    )
+    viz_categorical = [c for c in categorical_cols if 1 < column_counts[c] <= 15]
+    viz_numeric = [c for c in numeric_cols if column_counts[c] > 0]
     
     with viz_col1:
         if viz_categorical:
@@ -564,7 +932,10 @@ def main():
             )
             
             if selected_cat_viz:
-                cat_counts = filtered_df[selected_cat_viz].value_counts().head(10)
+                cat_counts = get_value_counts(
+                    session, DATABASE, selected_schema, selected_table, selected_cat_viz, filters,
+                    sample_rows=sample_rows
+                )
                 st.bar_chart(cat_counts)
                 st.caption(f"Distribution of {selected_cat_viz} (Top 10)")
         else:
@@ -585,7 +956,10 @@ def main():
             )
             
             if selected_num_viz and selected_group_viz:
-                agg_data = filtered_df.groupby(selected_group_viz)[selected_num_viz].mean().head(10)
+                agg_data = get_group_agg(
+                    session, DATABASE, selected_schema, selected_table,
+                    selected_group_viz, selected_num_viz, filters, sample_rows=sample_rows
+                )
                 st.bar_chart(agg_data)
                 st.caption(f"Average {selected_num_viz} by {selected_group_viz} (Top 10)")
         elif viz_numeric:
@@ -595,7 +969,11 @@ def main():
                 key="viz_num_hist"
             )
             if selected_num_viz:
-                st.bar_chart(filtered_df[selected_num_viz].value_counts().sort_index().head(20))
+                value_counts = get_value_counts(
+                    session, DATABASE, selected_schema, selected_table, selected_num_viz, filters,
+                    limit=20, sort_by_value=True, sample_rows=sample_rows
+                )
+                st.bar_chart(value_counts)
                 st.caption(f"Distribution of {selected_num_viz}")
         else:
             st.info("No suitable numeric columns for visualization")
@@ -617,8 +995,11 @@ def main():
         )
         
         if stats_cols:
-            stats_df = filtered_df[stats_cols].describe()
+            stats_df = get_summary_stats(
+                session, DATABASE, selected_schema, selected_table, stats_cols, filters
+            )
             st.dataframe(stats_df, use_container_width=True)
+            st.caption("Percentiles (25%, 50%, 75%) are approximate")
     
     # Footer
     st.markdown("---")